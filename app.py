@@ -1,3 +1,4 @@
+import os
 from flask import Flask, jsonify
 from flask_restful import Api
 from flask_jwt_extended import JWTManager
@@ -7,6 +8,8 @@ from resources.weather import CurrentWeather, ForecastWithDate, RealTimeWeather,
 from resources.alerts import WeatherAlerts, SubscribeAlert, CancelAlert, CustomAlert
 from resources.utilities import  FeedbackResource, UserPreferences, UpdateLocation
 from auth import UserRegistration, UserLogin
+from services.weather_functions import warm_trending_cache
+from services.schema_functions import upgrade_schema
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -16,6 +19,7 @@ jwt = JWTManager(app)
 
 with app.app_context():
     db.create_all()
+    upgrade_schema()
 
 api.add_resource(UserRegistration, '/register')
 api.add_resource(UserLogin, '/login')
@@ -53,4 +57,6 @@ def internal_error(error):
     return jsonify({"status": "error", "message": "Internal Server Error"}), 500
 
 if __name__ == '__main__':
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        warm_trending_cache()
     app.run(debug=True)
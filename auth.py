@@ -1,8 +1,7 @@
 from flask_restful import Resource, reqparse
-from models import db, User, Subscription, CustomSubscription
+from models import db, User
 from flask_jwt_extended import create_access_token
-from services.weather_functions import get_current_weather
-from services. alert_functions import evaluate_custom_alert, evaluate_normal_alert
+from services.alert_functions import get_user_alerts
 
 class UserRegistration(Resource):
     def post(self):
@@ -30,22 +29,7 @@ class UserLogin(Resource):
         user = User.query.filter_by(username=args['username']).first()
         if user and user.check_password(args['password']):
             access_token = create_access_token(identity=user.username)
-            alerts = []
-
-            normal_subs = Subscription.query.filter_by(user_id=user.username).all()
-            for sub in normal_subs:
-                weather = get_current_weather(sub.location)
-                alert_msg = evaluate_normal_alert(sub, weather)
-                if alert_msg:
-                    alerts.append(alert_msg)
-
-            custom_subs = CustomSubscription.query.filter_by(user_id=user.username).all()
-            for sub in custom_subs:
-                weather = get_current_weather(sub.location)
-                alert_msg = evaluate_custom_alert(sub, weather)
-                if alert_msg:
-                    alerts.append(alert_msg)
-
+            alerts = get_user_alerts(user.username)
             alerts = list(set(alerts))
             return {"status": "success", "access_token": access_token, "alerts": alerts}, 200
 
@@ -22,7 +22,7 @@ class Subscription(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String(100), nullable=False)
     location = db.Column(db.String(255), nullable=False)
-    alert_type = db.Column(db.String(50), nullable=False)
+    alert_type = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     __table_args__ = (db.UniqueConstraint('user_id', 'location', 'alert_type', name='unique_subscription'),)
@@ -49,7 +49,10 @@ class UserSearchHistory(db.Model):
     location = db.Column(db.String(255), nullable=False)
     search_count = db.Column(db.Integer, default=1)
     last_searched = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    __table_args__ = (db.UniqueConstraint('user_id', 'location', name='unique_user_location'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'location', name='unique_user_location'),
+        db.Index('ix_ush_user_count', 'user_id', 'search_count'),
+    )
 
     def __repr__(self):
         return f"<UserSearchHistory user:{self.user_id} location:{self.location} count:{self.search_count}>"
@@ -76,4 +79,8 @@ class CustomSubscription(db.Model):
     alert_type = db.Column(db.Integer, nullable=False)
     operator = db.Column(db.String(2), nullable=True)
     threshold = db.Column(db.String(20), nullable=True)
+    threshold_num = db.Column(db.Float, nullable=True)
+    threshold_code = db.Column(db.SmallInteger, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_custom_sub_lookup', 'user_id', 'location', 'alert_type', 'operator', 'threshold_num', 'threshold_code'),)
@@ -2,7 +2,7 @@ from flask_restful import Resource, reqparse
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask import request, Response, stream_with_context
 import json, time, datetime
-from services.weather_functions import get_current_weather, get_forecast_with_date, get_forecast, get_detailed_forecast, compare_weather, get_climate_data, split_locations, get_trending_weather, get_seasonal_changes, get_historical_weather, get_suggested_activities, get_weather_recommendation, get_prediction_confidence
+from services.weather_functions import get_current_weather, get_forecast_with_date, get_forecast, get_detailed_forecast, compare_weather, get_climate_data, split_locations, get_trending_weather, get_seasonal_changes, get_historical_weather, get_historical_weather_many, get_suggested_activities, get_weather_recommendation, get_prediction_confidence
 from services.user_functions import get_default_location
 
 class CurrentWeather(Resource):
@@ -142,9 +142,14 @@ class HistoricalWeather(Resource):
     def get(self):
         parser = reqparse.RequestParser()
         parser.add_argument('location', type=str, required=False, help="Location is optional")
+        parser.add_argument('locations', type=split_locations, required=False, help="Provide a comma-separated list of locations")
         parser.add_argument('date', type=str, required=True, help="Date (YYYY-MM-DD) is required")
         args = parser.parse_args()
 
+        if args.get("locations"):
+            data = get_historical_weather_many(args['locations'], args['date'])
+            return {"status": "success", "data": data}, 200
+
         user_id = get_jwt_identity()
         location = get_default_location(user_id, args.get("location"))
         if not location:
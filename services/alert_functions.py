@@ -1,6 +1,20 @@
 from models import db, Subscription, CustomSubscription
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert
 from flask_jwt_extended import get_jwt_identity
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import eq, gt, lt
 import json
+import re
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+STORM_DESCRIPTION_RE = re.compile(r"(?=.*?\b(?P<heavy>heavy))?.*?\b(?P<hit>thunderstorm|rain)", re.S)
 
 def get_weather_alerts(location):
     from services.weather_functions import get_current_weather
@@ -8,13 +22,13 @@ def get_weather_alerts(location):
     if not current or "error" in current:
         return {"error": "Weather data not available."}
 
-    current_weather = current.get("current_weather", {})
-    if not current_weather:
+    reading = read_weather(current)
+    if reading is None:
         return {"error": "No current weather data available."}
 
-    temp = current_weather.get("temperature_celsius")
-    wind_speed = current_weather.get("wind_speed_kph")
-    description = current_weather.get("weather_description", "").lower()
+    temp = reading.temperature
+    wind_speed = reading.wind_speed
+    description = reading.description
 
     alerts = []
     if temp is not None:
@@ -29,8 +43,9 @@ def get_weather_alerts(location):
         elif wind_speed > 40:
             alerts.append("Strong winds expected. Secure loose items outdoors.")
 
-    if "thunderstorm" in description or "rain" in description:
-        if "heavy" in description:
+    storm = STORM_DESCRIPTION_RE.match(description)
+    if storm:
+        if storm.group("heavy"):
             alerts.append("Heavy rain and thunderstorms expected.")
         else:
             alerts.append("Rain and possible thunderstorms detected.")
@@ -51,6 +66,10 @@ ALERT_TYPES = {
     8: "Heavy rain and thunderstorms warning (heavy rain)"
 }
 
+_ALERT_KEYS = frozenset(ALERT_TYPES)
+
+_INVALID_ALERT_TYPE_MSG = "Invalid alert type. Acceptable values are: " + ", ".join(f"{k}: {v}" for k, v in ALERT_TYPES.items())
+
 ALERT_TYPE_TEMP = 1
 ALERT_TYPE_WIND = 2
 ALERT_TYPE_PRECIP = 3
@@ -61,79 +80,155 @@ CUSTOM_ALERT_TYPE = {
     ALERT_TYPE_PRECIP: "Precipitation Alert"
 }
 
-def subscribe_to_alert(user_id, location, alert_type):
+CONDITION_ALERT_TYPES = {
+    "temperature": ALERT_TYPE_TEMP,
+    "wind_speed": ALERT_TYPE_WIND,
+    "precipitation": ALERT_TYPE_PRECIP
+}
+
+PRECIP_THRESHOLD_ALIASES = {
+    "no rain": "no rain",
+    "clear": "no rain",
+    "cloud": "no rain",
+    "clouds": "no rain",
+    "cloudy": "no rain",
+    "sunny": "no rain",
+    "light": "light",
+    "moderate": "moderate",
+    "heavy": "heavy"
+}
+
+NUMBER_RE = re.compile(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?")
+
+PRECIP_CODES = {
+    "no rain": 0,
+    "light": 1,
+    "moderate": 2,
+    "heavy": 3
+}
+
+@dataclass(slots=True)
+class EvalSub:
+    location: str
+    alert_type: int
+    operator: str = None
+    threshold: str = None
+    threshold_num: float = None
+    threshold_code: int = None
+
+def get_eval_subscriptions(user_id):
+    normal_rows = db.session.query(Subscription.location, Subscription.alert_type) \
+        .filter_by(user_id=user_id).all()
+    custom_rows = db.session.query(
+        CustomSubscription.location,
+        CustomSubscription.alert_type,
+        CustomSubscription.operator,
+        CustomSubscription.threshold,
+        CustomSubscription.threshold_num,
+        CustomSubscription.threshold_code
+    ).filter_by(user_id=user_id).all()
+    return [EvalSub(*row) for row in normal_rows], [EvalSub(*row) for row in custom_rows]
+
+def _parse_alert_type(alert_type):
     if not alert_type:
-        return (
-        False, "Invalid alert type. Acceptable values are: " + ", ".join([f"{k}: {v}" for k, v in ALERT_TYPES.items()]))
+        return None
     try:
         alert_type = int(alert_type)
     except ValueError:
-        return (
-        False, "Invalid alert type. Acceptable values are: " + ", ".join([f"{k}: {v}" for k, v in ALERT_TYPES.items()]))
-    if alert_type not in ALERT_TYPES:
-        return (
-        False, "Invalid alert type. Acceptable values are: " + ", ".join([f"{k}: {v}" for k, v in ALERT_TYPES.items()]))
+        return None
+    return alert_type if alert_type in _ALERT_KEYS else None
 
-    existing = Subscription.query.filter_by(user_id=user_id, location=location, alert_type=alert_type).first()
-    if existing:
-        return (False,
-                f"User {user_id} is already subscribed to alert type {alert_type} ({ALERT_TYPES[alert_type]}) for {location}.")
+def subscribe_to_alert(user_id, location, alert_type):
+    alert_type = _parse_alert_type(alert_type)
+    if alert_type is None:
+        return False, _INVALID_ALERT_TYPE_MSG
 
-    subscription = Subscription(user_id=user_id, location=location, alert_type=alert_type)
-    db.session.add(subscription)
+    stmt = insert(Subscription).values(user_id=user_id, location=location, alert_type=alert_type) \
+        .on_conflict_do_nothing(index_elements=["user_id", "location", "alert_type"])
     try:
+        result = db.session.execute(stmt)
         db.session.commit()
-        return (
-        True, f"User {user_id} subscribed to alert type {alert_type} ({ALERT_TYPES[alert_type]}) for {location}.")
     except Exception as e:
         db.session.rollback()
         return (False, f"An error occurred: {str(e)}")
 
-def create_custom_alert(user_id, location, condition, operator=None, threshold=None):
-    condition_lower = condition.lower().strip() if condition else ""
-    mapping = {
-        "temperature": ALERT_TYPE_TEMP,
-        "wind_speed": ALERT_TYPE_WIND,
-        "precipitation": ALERT_TYPE_PRECIP
-    }
-    alert_type = mapping.get(condition_lower)
+    if result.rowcount == 0:
+        return (False,
+                f"User {user_id} is already subscribed to alert type {alert_type} ({ALERT_TYPES[alert_type]}) for {location}.")
+    return (
+    True, f"User {user_id} subscribed to alert type {alert_type} ({ALERT_TYPES[alert_type]}) for {location}.")
+
+def subscribe_to_alerts_bulk(user_id, records):
+    rows = {}
+    for location, alert_type in records:
+        parsed = _parse_alert_type(alert_type)
+        if parsed is None:
+            return False, _INVALID_ALERT_TYPE_MSG
+        rows[(location, parsed)] = {"user_id": user_id, "location": location, "alert_type": parsed}
+    if not rows:
+        return False, "No subscriptions provided."
+
+    stmt = insert(Subscription).on_conflict_do_nothing(index_elements=["user_id", "location", "alert_type"])
+    try:
+        with db.session.no_autoflush:
+            db.session.execute(stmt, list(rows.values()))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return False, f"An error occurred: {str(e)}"
+    return True, f"Processed {len(rows)} alert subscriptions for user {user_id}."
+
+def _norm(s):
+    return s.strip().lower() if s else ""
+
+PRECIP_CANCEL_THRESHOLDS = {name: name for name in PRECIP_CODES}
+
+def _validate_custom_params(condition, operator, threshold, precip_thresholds=PRECIP_THRESHOLD_ALIASES):
+    if not condition:
+        return None, None, None, None, None, "missing_condition"
+    alert_type = CONDITION_ALERT_TYPES.get(_norm(condition))
     if alert_type is None:
-        return False, "Condition must be 'temperature', 'wind_speed', or 'precipitation'."
+        return None, None, None, None, None, "bad_condition"
 
-    if alert_type in (ALERT_TYPE_TEMP, ALERT_TYPE_WIND):
-        if not operator or operator.strip() not in (">", "<"):
-            return False, "Temperature and wind speed alerts require an operator ('>' or '<')."
-        operator = operator.strip()
+    if alert_type == ALERT_TYPE_PRECIP:
+        threshold = precip_thresholds.get(_norm(threshold))
         if threshold is None:
-            return False, "Threshold must be provided for temperature and wind speed alerts."
-        try:
-            float(threshold)
-        except (ValueError, TypeError):
-            return False, "Threshold must be a numeric value for temperature and wind speed alerts."
-    elif alert_type == ALERT_TYPE_PRECIP:
-        valid_mapping = {
-            "no rain": "no rain",
-            "clear": "no rain",
-            "cloud": "no rain",
-            "clouds": "no rain",
-            "cloudy": "no rain",
-            "sunny": "no rain",
-            "light": "light",
-            "moderate": "moderate",
-            "heavy": "heavy"
-        }
-        if not threshold or threshold.lower().strip() not in valid_mapping:
-            return False, ("Precipitation threshold must be one of: no rain, clear, cloud, clouds, cloudy, sunny, light, moderate, or heavy.")
-        operator = None
-        threshold = valid_mapping[threshold.lower().strip()]
-
-    existing = CustomSubscription.query.filter_by(
+            return alert_type, None, None, None, None, "bad_precip_threshold"
+        return alert_type, None, threshold, None, PRECIP_CODES[threshold], None
+
+    operator = operator.strip() if operator else ""
+    if operator not in (">", "<"):
+        return alert_type, None, None, None, None, "bad_operator"
+    if threshold is None or threshold == "":
+        return alert_type, operator, None, None, None, "missing_threshold"
+    threshold = str(threshold).strip()
+    if not NUMBER_RE.fullmatch(threshold):
+        return alert_type, operator, None, None, None, "threshold_not_numeric"
+    return alert_type, operator, threshold, float(threshold), None, None
+
+CREATE_CUSTOM_ALERT_ERRORS = {
+    "missing_condition": "Condition must be 'temperature', 'wind_speed', or 'precipitation'.",
+    "bad_condition": "Condition must be 'temperature', 'wind_speed', or 'precipitation'.",
+    "bad_operator": "Temperature and wind speed alerts require an operator ('>' or '<').",
+    "missing_threshold": "Threshold must be provided for temperature and wind speed alerts.",
+    "threshold_not_numeric": "Threshold must be a numeric value for temperature and wind speed alerts.",
+    "bad_precip_threshold": "Precipitation threshold must be one of: no rain, clear, cloud, clouds, cloudy, sunny, light, moderate, or heavy.",
+}
+
+def create_custom_alert(user_id, location, condition, operator=None, threshold=None):
+    alert_type, operator, threshold, threshold_num, threshold_code, error = _validate_custom_params(
+        condition, operator, threshold)
+    if error:
+        return False, CREATE_CUSTOM_ALERT_ERRORS[error]
+
+    existing = db.session.query(CustomSubscription.query.filter_by(
         user_id=user_id,
         location=location,
         alert_type=alert_type,
         operator=operator,
-        threshold=str(threshold)
-    ).first()
+        threshold_num=threshold_num,
+        threshold_code=threshold_code
+    ).exists()).scalar()
     if existing:
         return False, f"A subscription for this alert already exists at {location}."
 
@@ -142,7 +237,9 @@ def create_custom_alert(user_id, location, condition, operator=None, threshold=N
         location=location,
         alert_type=alert_type,
         operator=operator,
-        threshold=str(threshold)
+        threshold=str(threshold),
+        threshold_num=threshold_num,
+        threshold_code=threshold_code
     )
     db.session.add(subscription)
     try:
@@ -152,142 +249,252 @@ def create_custom_alert(user_id, location, condition, operator=None, threshold=N
         db.session.rollback()
         return False, f"An error occurred: {str(e)}"
 
+PRECIP_CONDITION_LABELS = {0: "No rain", 1: "Light rain", 2: "Moderate rain", 3: "Heavy rain"}
+
+def _describe_temperature_alert(alert_data):
+    return f"Temperature {alert_data.get('operator', '?')} {alert_data.get('threshold', '?')}°C"
+
+def _describe_wind_alert(alert_data):
+    return f"Wind speed > {alert_data.get('threshold', '?')} km/h"
+
+def _describe_precip_alert(alert_data):
+    return f"Precipitation alert: {PRECIP_CONDITION_LABELS.get(alert_data.get('precip_condition'), 'Unknown')}"
+
+def _describe_unknown_alert(alert_data):
+    return "Unknown custom alert"
+
+CUSTOM_ALERT_DESCRIBERS = {
+    ALERT_TYPE_TEMP: _describe_temperature_alert,
+    ALERT_TYPE_WIND: _describe_wind_alert,
+    ALERT_TYPE_PRECIP: _describe_precip_alert
+}
+
+@lru_cache(maxsize=4096)
+def _parse_alert_json(alert_json):
+    return _json_loads(alert_json)
+
 def get_custom_alert_description(alert_json):
     try:
-        alert_data = json.loads(alert_json)
+        alert_data = _parse_alert_json(alert_json)
     except Exception:
         return "Unknown custom alert"
 
-    category = alert_data.get("category")
-    if category == 1:
-        operator = alert_data.get("operator", "?")
-        threshold = alert_data.get("threshold", "?")
-        return f"Temperature {operator} {threshold}°C"
-    elif category == 2:
-        threshold = alert_data.get("threshold", "?")
-        return f"Wind speed > {threshold} km/h"
-    elif category == 3:
-        precip_mapping = {0: "No rain", 1: "Light rain", 2: "Moderate rain", 3: "Heavy rain"}
-        condition = alert_data.get("precip_condition")
-        description = precip_mapping.get(condition, "Unknown")
-        return f"Precipitation alert: {description}"
-    else:
-        return "Unknown custom alert"
-
-def map_precipitation_category(description):
-    desc = description.lower() if description else ""
+    return CUSTOM_ALERT_DESCRIBERS.get(alert_data.get("category"), _describe_unknown_alert)(alert_data)
 
-    no_rain_keywords = [
+PRECIP_KEYWORDS = (
+    ("no rain", (
         "clear sky", "mainly clear", "partly cloudy", "overcast", "fog", "depositing rime fog"
-    ]
-    for word in no_rain_keywords:
-        if word in desc:
-            return "no rain"
-
-    light_keywords = [
-        "light drizzle", "light freezing drizzle", "slight rain",
+    )),
+    ("light", (
+        "light drizzle", "light freezing drizzle", "light freezing rain", "slight rain",
         "slight rain showers", "slight snow fall", "slight snow showers", "snow grains"
-    ]
-    for word in light_keywords:
-        if word in desc:
-            return "light"
-
-    moderate_keywords = [
+    )),
+    ("moderate", (
         "moderate drizzle", "moderate rain", "moderate rain showers",
         "moderate snow fall", "moderate snow showers", "slight or moderate thunderstorm",
         "thunderstorm with slight hail"
-    ]
-    for word in moderate_keywords:
-        if word in desc:
-            return "moderate"
-
-    heavy_keywords = [
+    )),
+    ("heavy", (
         "dense drizzle", "dense freezing drizzle", "heavy rain",
         "heavy freezing rain", "heavy snow fall", "heavy rain showers",
         "heavy snow showers", "thunderstorm with heavy hail"
-    ]
-    for word in heavy_keywords:
-        if word in desc:
-            return "heavy"
+    ))
+)
+
+_PRECIP_GROUP_CATEGORIES = {category.replace(" ", "_"): category for category, _ in PRECIP_KEYWORDS}
+
+_PRECIP_RE = re.compile("|".join(
+    "(?=.*?(?P<%s>%s))" % (category.replace(" ", "_"), "|".join(re.escape(word) for word in keywords))
+    for category, keywords in PRECIP_KEYWORDS
+), re.S)
+
+def _scan_precipitation_category(desc):
+    match = _PRECIP_RE.match(desc)
+    if match is None:
+        return "unknown"
+    return _PRECIP_GROUP_CATEGORIES[match.lastgroup]
+
+_PRECIP_PHRASES = {
+    word: _scan_precipitation_category(word)
+    for _, keywords in PRECIP_KEYWORDS
+    for word in keywords
+}
+
+@lru_cache(maxsize=128)
+def precipitation_category_lc(desc):
+    category = _PRECIP_PHRASES.get(desc)
+    if category is not None:
+        return category
+    return _scan_precipitation_category(desc)
+
+@lru_cache(maxsize=128)
+def map_precipitation_category(description):
+    return precipitation_category_lc(description.lower() if description else "")
+
+NORMAL_ALERT_RULES = {
+    1: ("temperature", gt, 35, "Alert: Temperature at {location} is {value}°C, exceeding 35°C."),
+    2: ("temperature", gt, 30, "Alert: Temperature at {location} is {value}°C, exceeding 30°C."),
+    3: ("temperature", lt, 5, "Alert: Temperature at {location} is {value}°C, below 5°C."),
+    4: ("temperature", lt, 15, "Alert: Temperature at {location} is {value}°C, below 15°C."),
+    5: ("wind_speed", gt, 40, "Alert: Wind speed at {location} is {value} km/h, exceeding 40 km/h."),
+    6: ("wind_speed", gt, 60, "Alert: Wind speed at {location} is {value} km/h, exceeding 60 km/h."),
+    7: ("precip_category", eq, "moderate", "Alert: Precipitation at {location} is moderate."),
+    8: ("precip_category", eq, "heavy", "Alert: Heavy rain detected at {location}.")
+}
 
-    return "unknown"
+@dataclass(slots=True)
+class WeatherReading:
+    temperature: float
+    wind_speed: float
+    description: str
+    precip_category: str
+    precip_code: int
+    normal_mask: int = 0
 
-def evaluate_normal_alert(subscription, weather):
+def read_weather(weather):
     cw = weather.get("current_weather", {})
     if not cw:
         return None
 
-    temp = cw.get("temperature_celsius")
-    wind = cw.get("wind_speed_kph")
-    desc = cw.get("weather_description", "").lower()
+    description = (cw.get("weather_description") or "").lower()
+    precip_category = precipitation_category_lc(description)
+    reading = WeatherReading(
+        cw.get("temperature_celsius"),
+        cw.get("wind_speed_kph"),
+        description,
+        precip_category,
+        PRECIP_CODES.get(precip_category, -1)
+    )
+    reading.normal_mask = classify_normal_alerts(reading)
+    return reading
+
+def classify_normal_alerts(reading):
+    mask = 0
+    for alert_type, (field, compare, limit, _) in NORMAL_ALERT_RULES.items():
+        value = getattr(reading, field)
+        if value is not None and compare(value, limit):
+            mask |= 1 << alert_type
+    return mask
+
+def evaluate_normal_alert(subscription, weather, reading=None):
+    if reading is None:
+        reading = read_weather(weather)
+        if reading is None:
+            return None
+
     alert_type = subscription.alert_type
+    rule = NORMAL_ALERT_RULES.get(alert_type)
+    if rule is None or not reading.normal_mask & (1 << alert_type):
+        return None
+    field, _, _, template = rule
+    return template.format(location=subscription.location, value=getattr(reading, field))
+
+CUSTOM_ALERT_MESSAGES = {
+    (ALERT_TYPE_TEMP, ">"): "Temperature at {location} is {temp}°C, exceeding {threshold}°C.",
+    (ALERT_TYPE_TEMP, "<"): "Temperature at {location} is {temp}°C, below {threshold}°C.",
+    (ALERT_TYPE_WIND, ">"): "Wind speed at {location} is {wind} km/h, exceeding {threshold} km/h.",
+    (ALERT_TYPE_WIND, "<"): "Wind speed at {location} is {wind} km/h, below {threshold} km/h.",
+    (ALERT_TYPE_PRECIP, None): "Precipitation at {location} is '{threshold}'."
+}
+
+COMPARATORS = {">": gt, "<": lt}
 
-    if alert_type == "1":
-        if temp is not None and temp > 35:
-            return f"Alert: Temperature at {subscription.location} is {temp}°C, exceeding 35°C."
-    elif alert_type == "2":
-        if temp is not None and temp > 30:
-            return f"Alert: Temperature at {subscription.location} is {temp}°C, exceeding 30°C."
-    elif alert_type == "3":
-        if temp is not None and temp < 5:
-            return f"Alert: Temperature at {subscription.location} is {temp}°C, below 5°C."
-    elif alert_type == "4":
-        if temp is not None and temp < 15:
-            return f"Alert: Temperature at {subscription.location} is {temp}°C, below 15°C."
-    elif alert_type == "5":
-        if wind is not None and wind > 40:
-            return f"Alert: Wind speed at {subscription.location} is {wind} km/h, exceeding 40 km/h."
-    elif alert_type == "6":
-        if wind is not None and wind > 60:
-            return f"Alert: Wind speed at {subscription.location} is {wind} km/h, exceeding 60 km/h."
-    elif alert_type == "7":
-        current_category = map_precipitation_category(cw.get("weather_description", ""))
-        if current_category == "moderate":
-            return f"Alert: Precipitation at {subscription.location} is moderate."
-    elif alert_type == "8":
-        current_category = map_precipitation_category(cw.get("weather_description", ""))
-        if current_category == "heavy":
-            return f"Alert: Heavy rain detected at {subscription.location}."
+@lru_cache(maxsize=1024)
+def compile_custom_alert(alert_type, operator, threshold_num, threshold_code):
+    if alert_type == ALERT_TYPE_PRECIP:
+        if threshold_code is None:
+            return None
+        return lambda temp, wind, precip_code: precip_code == threshold_code
+
+    compare = COMPARATORS.get(operator)
+    if compare is None or threshold_num is None:
+        return None
+    if alert_type == ALERT_TYPE_TEMP:
+        return lambda temp, wind, precip_code: temp is not None and compare(temp, threshold_num)
+    if alert_type == ALERT_TYPE_WIND:
+        return lambda temp, wind, precip_code: wind is not None and compare(wind, threshold_num)
     return None
 
-def evaluate_custom_alert(subscription, weather):
-    cw = weather.get("current_weather", {})
-    if not cw:
+def _check_custom_alert(subscription, temp, wind, precip_code):
+    predicate = compile_custom_alert(
+        subscription.alert_type,
+        subscription.operator,
+        subscription.threshold_num,
+        subscription.threshold_code
+    )
+    if predicate is None or not predicate(temp, wind, precip_code):
         return None
+    return CUSTOM_ALERT_MESSAGES[(subscription.alert_type, subscription.operator)].format(
+        location=subscription.location,
+        temp=temp,
+        wind=wind,
+        threshold=subscription.threshold
+    )
 
-    if subscription.alert_type == ALERT_TYPE_TEMP:
-        try:
-            thresh = float(subscription.threshold)
-        except:
-            return None
-        temp = cw.get("temperature_celsius")
-        if temp is None:
-            return None
-        if subscription.operator == ">" and temp > thresh:
-            return f"Temperature at {subscription.location} is {temp}°C, exceeding {subscription.threshold}°C."
-        elif subscription.operator == "<" and temp < thresh:
-            return f"Temperature at {subscription.location} is {temp}°C, below {subscription.threshold}°C."
-    elif subscription.alert_type == ALERT_TYPE_WIND:
-        try:
-            thresh = float(subscription.threshold)
-        except:
+def evaluate_custom_alert(subscription, weather, reading=None):
+    if reading is None:
+        reading = read_weather(weather)
+        if reading is None:
             return None
-        wind = cw.get("wind_speed_kph")
-        if wind is None:
-            return None
-        if subscription.operator == ">" and wind > thresh:
-            return f"Wind speed at {subscription.location} is {wind} km/h, exceeding {subscription.threshold} km/h."
-        elif subscription.operator == "<" and wind < thresh:
-            return f"Wind speed at {subscription.location} is {wind} km/h, below {subscription.threshold} km/h."
-    elif subscription.alert_type == ALERT_TYPE_PRECIP:
-        current_category = map_precipitation_category(cw.get("weather_description", ""))
-        subscribed_category = subscription.threshold.lower().strip()
-        if current_category == subscribed_category:
-            return f"Precipitation at {subscription.location} is '{current_category}'."
-    return None
+    return _check_custom_alert(subscription, reading.temperature, reading.wind_speed, reading.precip_code)
+
+def evaluate_custom_alerts(subscriptions, weather, reading=None):
+    if reading is None:
+        reading = read_weather(weather)
+        if reading is None:
+            return []
+
+    temp = reading.temperature
+    wind = reading.wind_speed
+    precip_code = reading.precip_code
+    alerts = []
+    for sub in subscriptions:
+        alert_msg = _check_custom_alert(sub, temp, wind, precip_code)
+        if alert_msg:
+            alerts.append(alert_msg)
+    return alerts
+
+def evaluate_all(normal_subs, custom_subs, weather, reading=None):
+    if reading is None:
+        reading = read_weather(weather)
+        if reading is None:
+            return []
+
+    alerts = []
+    for sub in normal_subs:
+        alert_msg = evaluate_normal_alert(sub, weather, reading)
+        if alert_msg:
+            alerts.append(alert_msg)
+    alerts.extend(evaluate_custom_alerts(custom_subs, weather, reading))
+    return alerts
+
+def get_user_alerts(user_id):
+    from services.weather_functions import get_current_weather
+    normal_subs, custom_subs = get_eval_subscriptions(user_id)
+
+    by_location = {}
+    for sub in normal_subs:
+        by_location.setdefault(sub.location, ([], []))[0].append(sub)
+    for sub in custom_subs:
+        by_location.setdefault(sub.location, ([], []))[1].append(sub)
+
+    alerts = []
+    for location, (normal, custom) in by_location.items():
+        weather = get_current_weather(location)
+        alerts.extend(evaluate_all(normal, custom, weather))
+    return alerts
+
+CANCEL_ALERT_ERRORS = {
+    "missing_condition": "For custom subscriptions, 'condition' is required.",
+    "bad_condition": "Condition must be 'temperature', 'wind_speed', or 'precipitation'.",
+    "bad_operator": "For custom temperature and wind_speed alerts, 'operator' is required and must be '>' or '<'.",
+    "missing_threshold": "For custom temperature and wind_speed alerts, 'threshold' is required.",
+    "threshold_not_numeric": "For custom temperature and wind_speed alerts, 'threshold' must be numeric.",
+    "bad_precip_threshold": "For custom precipitation alerts, 'threshold' must be one of: no rain, light, moderate, heavy.",
+}
 
 def cancel_alert(args):
-    subscription_type = args.get("subscription_type").lower().strip()
+    subscription_type = _norm(args.get("subscription_type"))
     location = args.get("location").strip()
     user_id = get_jwt_identity()
 
@@ -302,68 +509,42 @@ def cancel_alert(args):
             alert_type_int = int(alert_type_str)
         except ValueError:
             return {"status": "error", "message": "alert_type must be an integer."}, 400
+        if alert_type_int not in _ALERT_KEYS:
+            return {"status": "error", "message": f"No active normal subscription for alert type {alert_type_int} in {location}."}, 400
 
-        subscription = Subscription.query.filter_by(
+        result = db.session.execute(delete(Subscription).filter_by(
             user_id=user_id,
             location=location,
-            alert_type=str(alert_type_int)
-        ).first()
+            alert_type=alert_type_int
+        ))
+        db.session.commit()
 
-        if subscription:
-            db.session.delete(subscription)
-            db.session.commit()
-            return {"status": "success", "message": f"Cancelled normal alert type {alert_type_int} ({ALERT_TYPES.get(alert_type_int, 'Unknown')}) for {location}."}, 200
+        if result.rowcount:
+            return {"status": "success", "message": f"Cancelled normal alert type {alert_type_int} ({ALERT_TYPES[alert_type_int]}) for {location}."}, 200
         else:
             return {"status": "error", "message": f"No active normal subscription for alert type {alert_type_int} in {location}."}, 400
 
     elif subscription_type == "custom":
         condition = args.get("condition")
-        if not condition:
-            return {"status": "error", "message": "For custom subscriptions, 'condition' is required."}, 400
-        cond_lower = condition.lower().strip()
-        mapping = {
-            "temperature": ALERT_TYPE_TEMP,
-            "wind_speed": ALERT_TYPE_WIND,
-            "precipitation": ALERT_TYPE_PRECIP
-        }
-        alert_type = mapping.get(cond_lower)
-        if alert_type is None:
-            return {"status": "error", "message": "Condition must be 'temperature', 'wind_speed', or 'precipitation'."}, 400
-
-        if alert_type in (ALERT_TYPE_TEMP, ALERT_TYPE_WIND):
-            operator = args.get("operator")
-            threshold = args.get("threshold")
-            if not operator or operator.strip() not in (">", "<"):
-                return {"status": "error", "message": "For custom temperature and wind_speed alerts, 'operator' is required and must be '>' or '<'."}, 400
-            operator = operator.strip()
-            if not threshold:
-                return {"status": "error", "message": "For custom temperature and wind_speed alerts, 'threshold' is required."}, 400
-            try:
-                float(threshold)
-            except ValueError:
-                return {"status": "error", "message": "For custom temperature and wind_speed alerts, 'threshold' must be numeric."}, 400
-        elif alert_type == ALERT_TYPE_PRECIP:
-            threshold = args.get("threshold")
-            valid_levels = ["no rain", "light", "moderate", "heavy"]
-            if not threshold or threshold.lower().strip() not in valid_levels:
-                return {"status": "error", "message": "For custom precipitation alerts, 'threshold' must be one of: no rain, light, moderate, heavy."}, 400
-            operator = None
-            threshold = threshold.lower().strip()
-
-        subscription = CustomSubscription.query.filter_by(
+        alert_type, operator, threshold, threshold_num, threshold_code, error = _validate_custom_params(
+            condition, args.get("operator"), args.get("threshold"), PRECIP_CANCEL_THRESHOLDS)
+        if error:
+            return {"status": "error", "message": CANCEL_ALERT_ERRORS[error]}, 400
+
+        result = db.session.execute(delete(CustomSubscription).filter_by(
             user_id=user_id,
             location=location,
             alert_type=alert_type,
             operator=operator,
-            threshold=str(threshold)
-        ).first()
+            threshold_num=threshold_num,
+            threshold_code=threshold_code
+        ))
+        db.session.commit()
 
-        if subscription:
-            db.session.delete(subscription)
-            db.session.commit()
+        if result.rowcount:
             return {"status": "success", "message": f"Cancelled custom alert for {CUSTOM_ALERT_TYPE.get(alert_type, 'Unknown')} at {location}."}, 200
         else:
-            return {"status": "error", "message": f"No active custom subscription found for {cond_lower} alert at {location}."}, 400
+            return {"status": "error", "message": f"No active custom subscription found for {_norm(condition)} alert at {location}."}, 400
 
 
 
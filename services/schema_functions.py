@@ -0,0 +1,69 @@
+from models import db, Subscription, CustomSubscription
+from sqlalchemy import Integer, bindparam, inspect, select, text, update
+from services.alert_functions import ALERT_TYPE_PRECIP, PRECIP_CODES
+
+CUSTOM_THRESHOLD_COLUMNS = ("threshold_num", "threshold_code")
+
+def upgrade_schema():
+    with db.engine.begin() as conn:
+        _upgrade_subscription_alert_type(conn)
+        _add_custom_threshold_columns(conn)
+        _backfill_custom_thresholds(conn)
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+def _columns(conn, table_name):
+    return {column["name"]: column for column in inspect(conn).get_columns(table_name)}
+
+def _upgrade_subscription_alert_type(conn):
+    table = Subscription.__table__
+    if isinstance(_columns(conn, table.name)["alert_type"]["type"], Integer):
+        return
+
+    legacy_name = f"{table.name}_legacy"
+    conn.execute(text(f"ALTER TABLE {table.name} RENAME TO {legacy_name}"))
+    for index in table.indexes:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    table.create(conn)
+    conn.execute(text(
+        f"INSERT OR IGNORE INTO {table.name} (id, user_id, location, alert_type, created_at) "
+        f"SELECT id, user_id, location, CAST(TRIM(alert_type) AS INTEGER), created_at FROM {legacy_name}"
+    ))
+    conn.execute(text(f"DROP TABLE {legacy_name}"))
+
+def _add_custom_threshold_columns(conn):
+    table = CustomSubscription.__table__
+    existing = _columns(conn, table.name)
+    for name in CUSTOM_THRESHOLD_COLUMNS:
+        if name not in existing:
+            column_type = table.c[name].type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+
+def _backfill_custom_thresholds(conn):
+    table = CustomSubscription.__table__
+    rows = conn.execute(
+        select(table.c.id, table.c.alert_type, table.c.threshold)
+        .where(table.c.threshold_num.is_(None), table.c.threshold_code.is_(None))
+    ).all()
+
+    updates = []
+    for row_id, alert_type, threshold in rows:
+        threshold = (threshold or "").strip()
+        if alert_type == ALERT_TYPE_PRECIP:
+            code = PRECIP_CODES.get(threshold.lower())
+            if code is not None:
+                updates.append({"row_id": row_id, "num": None, "code": code})
+        else:
+            try:
+                updates.append({"row_id": row_id, "num": float(threshold), "code": None})
+            except ValueError:
+                pass
+
+    if updates:
+        conn.execute(
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values(threshold_num=bindparam("num"), threshold_code=bindparam("code")),
+            updates
+        )
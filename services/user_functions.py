@@ -1,33 +1,44 @@
 from models import db, UserSearchHistory, UserPreference, Subscription, CustomSubscription, UserLocation, Feedback
 from datetime import datetime
-from sqlalchemy import desc
+from sqlalchemy import desc, literal, null, select, union_all
+from sqlalchemy.dialects.sqlite import insert
 from services.alert_functions import ALERT_TYPES, ALERT_TYPE_PRECIP, ALERT_TYPE_WIND, ALERT_TYPE_TEMP
 
 def log_user_search(user_id, location):
-    record = UserSearchHistory.query.filter_by(user_id=user_id, location=location).first()
-    if record:
-        record.search_count += 1
-        record.last_searched = datetime.utcnow()
-    else:
-        record = UserSearchHistory(user_id=user_id, location=location, search_count=1)
-        db.session.add(record)
+    stmt = insert(UserSearchHistory).values(
+        user_id=user_id,
+        location=location,
+        search_count=1,
+        last_searched=datetime.utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "location"],
+        set_={
+            "search_count": UserSearchHistory.search_count + 1,
+            "last_searched": stmt.excluded.last_searched
+        }
+    )
+    db.session.execute(stmt)
+    update_user_preferences_from_history(user_id)
     db.session.commit()
 
-    update_user_preferences_from_history(user_id)
+def top_search_locations(user_id, limit=5):
+    return db.session.execute(
+        select(UserSearchHistory.location)
+        .where(UserSearchHistory.user_id == user_id)
+        .order_by(desc(UserSearchHistory.search_count))
+        .limit(limit)
+    ).scalars().all()
 
 def update_user_preferences_from_history(user_id):
-    search_history = UserSearchHistory.query.filter_by(user_id=user_id) \
-        .order_by(desc(UserSearchHistory.search_count)) \
-        .limit(5).all()
-    top_locations = [record.location for record in search_history]
+    top_locations = top_search_locations(user_id)
 
-    user_pref = UserPreference.query.filter_by(user_id=user_id).first()
-    if user_pref:
-        user_pref.top_searches = top_locations
-    else:
-        user_pref = UserPreference(user_id=user_id, top_searches=top_locations)
-        db.session.add(user_pref)
-    db.session.commit()
+    stmt = insert(UserPreference).values(user_id=user_id, top_searches=top_locations)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"top_searches": stmt.excluded.top_searches}
+    )
+    db.session.execute(stmt)
 
 def save_user_preferences(user_id, preferences):
     user_pref = UserPreference.query.filter_by(user_id=user_id).first()
@@ -41,51 +52,50 @@ def save_user_preferences(user_id, preferences):
     return f"Preferences for user {user_id} saved."
 
 def get_user_preferences(user_id):
-    search_history = UserSearchHistory.query.filter_by(user_id=user_id)\
-                      .order_by(desc(UserSearchHistory.search_count)).limit(5).all()
-    top_locations = [record.location for record in search_history]
-    subscriptions = []
+    top_locations = top_search_locations(user_id)
+    subscription_rows = db.session.execute(union_all(
+        select(literal(False).label("custom"), Subscription.location, Subscription.alert_type,
+               null().label("operator"), null().label("threshold"))
+        .where(Subscription.user_id == user_id),
+        select(literal(True).label("custom"), CustomSubscription.location, CustomSubscription.alert_type,
+               CustomSubscription.operator, CustomSubscription.threshold)
+        .where(CustomSubscription.user_id == user_id)
+    )).all()
 
-    normal_subs = Subscription.query.filter_by(user_id=user_id).all()
-    for sub in normal_subs:
-        try:
-            alert_num = int(sub.alert_type)
-            description = ALERT_TYPES.get(alert_num, "Unknown alert")
-        except Exception:
-            description = "Unknown alert"
-        subscriptions.append({
-            "location": sub.location,
-            "alert_type": sub.alert_type,
-            "description": description
-        })
-
-    custom_subs = CustomSubscription.query.filter_by(user_id=user_id).all()
-    for sub in custom_subs:
-        if sub.alert_type == ALERT_TYPE_TEMP:
-            description = f"Temperature {sub.operator} {sub.threshold}°C"
-        elif sub.alert_type == ALERT_TYPE_WIND:
-            description = f"Wind speed {sub.operator} {sub.threshold} km/h"
-        elif sub.alert_type == ALERT_TYPE_PRECIP:
-            description = f"Precipitation alert: {sub.threshold}"
+    subscriptions = []
+    custom_subscriptions = []
+    for custom, location, alert_type, operator, threshold in subscription_rows:
+        if not custom:
+            subscriptions.append({
+                "location": location,
+                "alert_type": str(alert_type),
+                "description": ALERT_TYPES.get(alert_type, "Unknown alert")
+            })
+            continue
+        if alert_type == ALERT_TYPE_TEMP:
+            description = f"Temperature {operator} {threshold}°C"
+        elif alert_type == ALERT_TYPE_WIND:
+            description = f"Wind speed {operator} {threshold} km/h"
+        elif alert_type == ALERT_TYPE_PRECIP:
+            description = f"Precipitation alert: {threshold}"
         else:
             description = "Unknown custom alert"
-        subscriptions.append({
-            "location": sub.location,
-            "alert_type": f"{sub.alert_type} (custom)",
+        custom_subscriptions.append({
+            "location": location,
+            "alert_type": f"{alert_type} (custom)",
             "description": description
         })
 
     return {
         "user_id": user_id,
         "top_searches": top_locations,
-        "subscriptions": subscriptions
+        "subscriptions": subscriptions + custom_subscriptions
     }
 
 def get_default_location(user_id, provided_location=None):
     if provided_location:
         return provided_location
-    prefs = get_user_preferences(user_id)
-    top_searches = prefs.get("top_searches", [])
+    top_searches = top_search_locations(user_id, limit=1)
     if top_searches:
         return top_searches[0]
     return None
@@ -98,6 +108,9 @@ def update_user_location(user_id, location):
         user_loc = UserLocation(user_id=user_id, location=location)
         db.session.add(user_loc)
     db.session.commit()
+
+    from services.weather_functions import prefetch_current_weather
+    prefetch_current_weather(location)
     return f"User {user_id}'s location updated to {location}."
 
 def submit_feedback(user_id, rating, comment=""):
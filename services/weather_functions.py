@@ -1,141 +1,258 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import difflib
+from statistics import fmean
+from itertools import chain, islice
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
 from models import UserLocation
 from datetime import timedelta, date
 from services.user_functions import log_user_search
+from services.cache_functions import TTLCache, SingleFlight, RateLimiter
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    _json_loads = json.loads
+
+FUZZY_MATCH_THRESHOLD = 0.65
+
+try:
+    from rapidfuzz.fuzz import ratio as _fuzz_ratio
+
+    def _is_fuzzy_match(query, field):
+        return _fuzz_ratio(query, field, score_cutoff=FUZZY_MATCH_THRESHOLD * 100) > 0
+except ImportError:
+    def _is_fuzzy_match(query, field):
+        return difflib.SequenceMatcher(None, query, field).ratio() >= FUZZY_MATCH_THRESHOLD
+
+_GEOCODE_CACHE = TTLCache(ttl=30 * 86400, maxsize=4096)
+GEOCODE_MISS_TTL = 300
+_HTTP_CACHE = TTLCache(ttl=600, maxsize=2048)
+_TRENDING_CACHE = TTLCache(ttl=6 * 3600, maxsize=2)
+TRENDING_RETRY_TTL = 300
+_INFLIGHT = SingleFlight()
+_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="weather")
+
+_SESSION = requests.Session()
+_SESSION.headers["User-Agent"] = "WeatherAggregatorAPI/1.0 (youremail@example.com)"
+_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504],
+                      raise_on_status=False)
+)
+_SESSION.mount("http://", _adapter)
+_SESSION.mount("https://", _adapter)
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+_SESSION.mount("https://nominatim.openstreetmap.org/", HTTPAdapter(max_retries=0))
+_NOMINATIM_HEADERS = {"Accept-Language": "en"}
+_NOMINATIM_LIMITER = RateLimiter(min_interval=1.05)
+NOMINATIM_ATTEMPTS = 3
+NOMINATIM_RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+TRENDING_FALLBACK_CITIES = ("Chicago", "London", "Tokyo", "Sydney", "Paris")
+
+CURRENT_WEATHER_TTL = 300
+FORECAST_TTL = 3600
+DETAILED_FORECAST_TTL = 600
+ARCHIVE_TTL = 30 * 86400
+ARCHIVE_SETTLE_DAYS = 7
+COORD_DECIMALS = 4
 
 def normalize(text):
-    return text.strip().lower() if text else ""
+    return " ".join(text.lower().split()) if text else ""
 
 def geocode_location(location):
-    location = location.strip()
+    location = " ".join(location.split())
     if not location:
         return None
     query_norm = normalize(location)
-    url = "https://nominatim.openstreetmap.org/search"
+    result = _GEOCODE_CACHE.get(query_norm)
+    if result is None:
+        result = _INFLIGHT.do(("geocode", query_norm), _geocode_and_cache, location, query_norm)
+    return result or None
+
+def _geocode_and_cache(location, query_norm):
+    result = _geocode_uncached(location, query_norm)
+    if result is False:
+        _GEOCODE_CACHE.set(query_norm, False, GEOCODE_MISS_TTL)
+    elif result is not None:
+        _GEOCODE_CACHE.set(query_norm, result)
+    return result
+
+def _geocode_uncached(location, query_norm):
     params = {
         "q": location,
         "format": "json",
         "addressdetails": 1,
         "limit": 5
     }
-    headers = {
-        "User-Agent": "WeatherAggregatorAPI/1.0 (youremail@example.com)",
-        "Accept-Language": "en"
-    }
     try:
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = _nominatim_get(params)
         response.raise_for_status()
-        data = response.json()
+        data = _json_loads(response.content)
         if not data:
             print(f"No results found for '{location}'")
-            return None
+            return False
         sorted_results = sorted(data, key=lambda x: x.get("importance", 0), reverse=True)
-        threshold = 0.65
+        fuzzy_candidates = []
         for candidate in sorted_results:
-            address = candidate.get("address", {})
-            candidate_fields = []
-            for field in ["city", "town", "village", "locality", "county", "state", "country"]:
-                if field in address:
-                    candidate_fields.append(address[field])
-            if candidate.get("display_name"):
-                candidate_fields.append(candidate.get("display_name"))
-            for field in candidate_fields:
-                norm_field = normalize(field)
-                if query_norm in norm_field:
-                    lat = float(candidate.get("lat"))
-                    lon = float(candidate.get("lon"))
-                    name = address.get("city") or address.get("town") or address.get("village") or address.get("locality") or candidate.get("display_name")
-                    region = address.get("state") or address.get("county")
-                    country = address.get("country")
-                    return {"lat": lat, "lon": lon, "name": name, "region": region, "country": country}
-                else:
-                    ratio = difflib.SequenceMatcher(None, query_norm, norm_field).ratio()
-                    if ratio >= threshold:
-                        lat = float(candidate.get("lat"))
-                        lon = float(candidate.get("lon"))
-                        name = address.get("city") or address.get("town") or address.get("village") or address.get("locality") or candidate.get("display_name")
-                        region = address.get("state") or address.get("county")
-                        country = address.get("country")
-                        return {"lat": lat, "lon": lon, "name": name, "region": region, "country": country}
+            norm_fields = [normalize(field) for field in _address_fields(candidate)]
+            display_name = normalize(candidate.get("display_name"))
+            if query_norm in display_name or any(query_norm in field for field in norm_fields):
+                return _geocode_match(candidate)
+            if display_name:
+                norm_fields.append(display_name.split(",", 1)[0].strip())
+            fuzzy_candidates.append((candidate, norm_fields))
+        for candidate, norm_fields in fuzzy_candidates:
+            if any(_is_fuzzy_match(query_norm, field) for field in norm_fields):
+                return _geocode_match(candidate)
         print(f"Location '{location}' not found with sufficient confidence.")
-        return None
-    except requests.exceptions.RequestException as e:
+        return False
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"Geocoding error: {e}")
         return None
 
-def get_weather_description(code):
-    weather_code_map = {
-        0: "Clear sky",
-        1: "Mainly clear",
-        2: "Partly cloudy",
-        3: "Overcast",
-        45: "Fog",
-        48: "Depositing rime fog",
-        51: "Light drizzle",
-        53: "Moderate drizzle",
-        55: "Dense drizzle",
-        56: "Light freezing drizzle",
-        57: "Dense freezing drizzle",
-        61: "Slight rain",
-        63: "Moderate rain",
-        65: "Heavy rain",
-        66: "Light freezing rain",
-        67: "Heavy freezing rain",
-        71: "Slight snow fall",
-        73: "Moderate snow fall",
-        75: "Heavy snow fall",
-        77: "Snow grains",
-        80: "Slight rain showers",
-        81: "Moderate rain showers",
-        82: "Heavy rain showers",
-        85: "Slight snow showers",
-        86: "Heavy snow showers",
-        95: "Slight or moderate thunderstorm",
-        96: "Thunderstorm with slight hail",
-        99: "Thunderstorm with heavy hail"
+def _nominatim_get(params):
+    for attempt in range(1, NOMINATIM_ATTEMPTS + 1):
+        _NOMINATIM_LIMITER.wait()
+        try:
+            response = _SESSION.get(NOMINATIM_URL, params=params, headers=_NOMINATIM_HEADERS, timeout=10)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == NOMINATIM_ATTEMPTS:
+                raise
+            continue
+        if response.status_code not in NOMINATIM_RETRY_STATUSES or attempt == NOMINATIM_ATTEMPTS:
+            return response
+
+GEOCODE_ADDRESS_FIELDS = ("city", "town", "village", "locality", "county", "state", "country")
+
+def _address_fields(candidate):
+    address = candidate.get("address", {})
+    return [address[field] for field in GEOCODE_ADDRESS_FIELDS if field in address]
+
+def _geocode_match(candidate):
+    address = candidate.get("address", {})
+    lat = float(candidate.get("lat"))
+    lon = float(candidate.get("lon"))
+    name = address.get("city") or address.get("town") or address.get("village") or address.get("locality") or candidate.get("display_name")
+    region = address.get("state") or address.get("county")
+    country = address.get("country")
+    return {"lat": lat, "lon": lon, "name": name, "region": region, "country": country}
+
+def _cached_get(url, params, ttl):
+    if "latitude" in params:
+        params = dict(params, latitude=round(params["latitude"], COORD_DECIMALS),
+                      longitude=round(params["longitude"], COORD_DECIMALS))
+    key = (url, tuple(sorted(params.items())))
+    data = _HTTP_CACHE.get(key)
+    if data is None:
+        data = _INFLIGHT.do(key, _fetch_and_cache, key, url, params, ttl)
+    return data
+
+def _fetch_and_cache(key, url, params, ttl):
+    response = _SESSION.get(url, params=params, timeout=10)
+    response.raise_for_status()
+    data = _json_loads(response.content)
+    _HTTP_CACHE.set(key, data, ttl)
+    return data
+
+def _archive_ttl(date_str):
+    try:
+        day = date.fromisoformat(date_str)
+    except (TypeError, ValueError):
+        return FORECAST_TTL
+    if day < date.today() - timedelta(days=ARCHIVE_SETTLE_DAYS):
+        return ARCHIVE_TTL
+    return FORECAST_TTL
+
+def geocode_locations_bulk(locations):
+    return {location: geocode_location(location) for location in dict.fromkeys(locations)}
+
+def _current_weather_many(locations):
+    geocoded = geocode_locations_bulk(locations)
+    return _pool.map(lambda loc: _current_weather_result(loc, geocoded[loc]), locations)
+
+def _geocode_details(geocode_result):
+    return {
+        "name": geocode_result.get("name", "Unknown"),
+        "region": geocode_result.get("region", "Unknown"),
+        "country": geocode_result.get("country", "Unknown")
     }
-    return weather_code_map.get(code, "Unknown")
+
+WEATHER_CODE_MAP = {
+    0: "Clear sky",
+    1: "Mainly clear",
+    2: "Partly cloudy",
+    3: "Overcast",
+    45: "Fog",
+    48: "Depositing rime fog",
+    51: "Light drizzle",
+    53: "Moderate drizzle",
+    55: "Dense drizzle",
+    56: "Light freezing drizzle",
+    57: "Dense freezing drizzle",
+    61: "Slight rain",
+    63: "Moderate rain",
+    65: "Heavy rain",
+    66: "Light freezing rain",
+    67: "Heavy freezing rain",
+    71: "Slight snow fall",
+    73: "Moderate snow fall",
+    75: "Heavy snow fall",
+    77: "Snow grains",
+    80: "Slight rain showers",
+    81: "Moderate rain showers",
+    82: "Heavy rain showers",
+    85: "Slight snow showers",
+    86: "Heavy snow showers",
+    95: "Slight or moderate thunderstorm",
+    96: "Thunderstorm with slight hail",
+    99: "Thunderstorm with heavy hail"
+}
+
+def get_weather_description(code):
+    return WEATHER_CODE_MAP.get(code, "Unknown")
 
 def get_current_weather(location, user_id=None):
     if user_id:
         log_user_search(user_id, location)
 
-    geocode_result = geocode_location(location)
+    return _current_weather_result(location, geocode_location(location))
+
+def _current_weather_result(location, geocode_result):
     if geocode_result is None:
         return {"error": f"Could not geocode location '{location}'."}
     lat, lon = geocode_result["lat"], geocode_result["lon"]
-    geocode_details = {
-        "name": geocode_result.get("name", "Unknown"),
-        "region": geocode_result.get("region", "Unknown"),
-        "country": geocode_result.get("country", "Unknown")
-    }
+    geocode_details = _geocode_details(geocode_result)
 
+    try:
+        formatted_current = _current_weather_at(lat, lon)
+        result = {"geocode": geocode_details, "current_weather": formatted_current}
+        return result
+    except Exception as e:
+        return {"error": str(e)}
+
+def _current_weather_at(lat, lon):
     url = "https://api.open-meteo.com/v1/forecast"
     params = {
         "latitude": lat,
         "longitude": lon,
         "current_weather": "true"
     }
-    try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        weather_data = response.json()
-        for key in ["generationtime_ms", "utc_offset_seconds", "timezone", "timezone_abbreviation"]:
-            weather_data.pop(key, None)
-        current = weather_data.get("current_weather", {})
-        formatted_current = {
-            "temperature_celsius": current.get("temperature"),
-            "wind_speed_kph": current.get("windspeed"),
-            "wind_direction": current.get("winddirection"),
-            "is_day": True if current.get("is_day") == 1 else False,
-            "weather_description": get_weather_description(current.get("weathercode"))
-        }
-        result = {"geocode": geocode_details, "current_weather": formatted_current}
-        return result
-    except Exception as e:
-        return {"error": str(e)}
+    weather_data = _cached_get(url, params, CURRENT_WEATHER_TTL)
+    current = weather_data.get("current_weather", {})
+    return {
+        "temperature_celsius": current.get("temperature"),
+        "wind_speed_kph": current.get("windspeed"),
+        "wind_direction": current.get("winddirection"),
+        "is_day": True if current.get("is_day") == 1 else False,
+        "weather_description": get_weather_description(current.get("weathercode"))
+    }
 
 def get_forecast(location, start_date=None):
     geocode_result = geocode_location(location)
@@ -143,11 +260,7 @@ def get_forecast(location, start_date=None):
         return {"error": f"Could not geocode location '{location}'."}
 
     lat, lon = geocode_result["lat"], geocode_result["lon"]
-    geocode_details = {
-        "name": geocode_result.get("name", "Unknown"),
-        "region": geocode_result.get("region", "Unknown"),
-        "country": geocode_result.get("country", "Unknown")
-    }
+    geocode_details = _geocode_details(geocode_result)
 
     if start_date is None:
         start_date_obj = date.today()
@@ -157,6 +270,20 @@ def get_forecast(location, start_date=None):
         except ValueError:
             return {"error": "Invalid start_date format. Use YYYY-MM-DD."}
 
+    try:
+        daily_data = _forecast_at(lat, lon, start_date_obj)
+        result = {
+            "geocode": geocode_details,
+            "forecast": daily_data
+        }
+        return result
+
+    except Exception as e:
+        return {"error": str(e)}
+
+def _forecast_at(lat, lon, start_date_obj=None):
+    if start_date_obj is None:
+        start_date_obj = date.today()
     end_date = (start_date_obj + timedelta(days=6)).isoformat()
     start_date = start_date_obj.isoformat()
 
@@ -169,31 +296,20 @@ def get_forecast(location, start_date=None):
         "end_date": end_date,
         "timezone": "auto"
     }
-
-    try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        daily_data = []
-        for i in range(len(data["daily"]["time"])):
-            daily_entry = {
-                "date": data["daily"]["time"][i],
-                "max_temp": f"{data['daily']['temperature_2m_max'][i]}°C",
-                "min_temp": f"{data['daily']['temperature_2m_min'][i]}°C",
-                "precipitation": f"{data['daily']['precipitation_sum'][i]} mm",
-                "weather": get_weather_description(data["daily"]["weathercode"][i])
-            }
-            daily_data.append(daily_entry)
-
-        result = {
-            "geocode": geocode_details,
-            "forecast": daily_data
+    data = _cached_get(url, params, FORECAST_TTL)
+
+    daily_data = []
+    for i in range(len(data["daily"]["time"])):
+        daily_entry = {
+            "date": data["daily"]["time"][i],
+            "max_temp": f"{data['daily']['temperature_2m_max'][i]}°C",
+            "max_temp_c": data["daily"]["temperature_2m_max"][i],
+            "min_temp": f"{data['daily']['temperature_2m_min'][i]}°C",
+            "precipitation": f"{data['daily']['precipitation_sum'][i]} mm",
+            "weather": get_weather_description(data["daily"]["weathercode"][i])
         }
-        return result
-
-    except Exception as e:
-        return {"error": str(e)}
+        daily_data.append(daily_entry)
+    return daily_data
 
 
 def get_forecast_with_date(location, start_date):
@@ -212,14 +328,11 @@ def split_locations(value):
     return [loc.strip() for loc in value.split(',') if loc.strip()]
 
 def compare_weather(locations):
-    results = {}
+    unique = {}
     for loc in locations:
-        weather = get_current_weather(loc)
-        if "error" in weather:
-            results[loc] = {"error": weather["error"]}
-        else:
-            results[loc] = weather
-    return results
+        unique.setdefault(normalize(loc), loc)
+    by_key = dict(zip(unique, _current_weather_many(list(unique.values()))))
+    return {loc: by_key[normalize(loc)] for loc in locations}
 
 def get_climate_data(region):
     geocode_result = geocode_location(region)
@@ -227,11 +340,7 @@ def get_climate_data(region):
         return {"error": f"Could not geocode region '{region}'."}
 
     lat, lon = geocode_result["lat"], geocode_result["lon"]
-    geocode_details = {
-        "name": geocode_result.get("name", "Unknown"),
-        "region": geocode_result.get("region", "Unknown"),
-        "country": geocode_result.get("country", "Unknown")
-    }
+    geocode_details = _geocode_details(geocode_result)
 
     end_date = date.today() - timedelta(days=1)
     start_date = end_date - timedelta(days=29)
@@ -247,9 +356,7 @@ def get_climate_data(region):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = _cached_get(url, params, _archive_ttl(end_date.isoformat()))
         daily = data.get("daily", {})
 
         temps_max = [t for t in daily.get("temperature_2m_max", []) if t is not None]
@@ -257,9 +364,9 @@ def get_climate_data(region):
         precip = [p for p in daily.get("precipitation_sum", []) if p is not None]
 
         if temps_max and temps_min and precip:
-            avg_max = sum(temps_max) / len(temps_max)
-            avg_min = sum(temps_min) / len(temps_min)
-            avg_precip = sum(precip) / len(precip)
+            avg_max = fmean(temps_max)
+            avg_min = fmean(temps_min)
+            avg_precip = fmean(precip)
 
             result = {
                 "geocode": geocode_details,
@@ -278,25 +385,36 @@ def get_climate_data(region):
 
 
 def get_trending_cities():
+    cities = _TRENDING_CACHE.get("cities")
+    if cities is None:
+        cities = _INFLIGHT.do("trending_cities", _refresh_trending_cities)
+    return list(cities)
+
+def _refresh_trending_cities():
+    cities = _scrape_trending_cities()
+    if cities:
+        _TRENDING_CACHE.set("cities", cities)
+        _TRENDING_CACHE.set("last_good", cities, float("inf"))
+    else:
+        cities = _TRENDING_CACHE.get("last_good", [])
+        _TRENDING_CACHE.set("cities", cities, TRENDING_RETRY_TTL)
+    return cities
+
+def _scrape_trending_cities():
     from bs4 import BeautifulSoup
-    import requests
 
     url = "https://en.wikipedia.org/wiki/Wikipedia:WikiProject_Cities/Popular_pages"
     try:
-        response = requests.get(url, timeout=10)
+        response = _SESSION.get(url, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        table = soup.find("table", class_="wikitable")
+        soup = BeautifulSoup(response.content, "lxml")
+        table = soup.select_one("table.wikitable")
         trending = []
         seen = set()
-        rows = table.find_all("tr")[1:]
-        for row in rows:
+        for cell in table.select("tr > td:nth-of-type(2)"):
             if len(trending) >= 5:
                 break
-            cells = row.find_all("td")
-            if len(cells) < 2:
-                continue
-            candidate = cells[1].get_text(strip=True)
+            candidate = cell.get_text(strip=True)
             if "List of" in candidate:
                 continue
 
@@ -315,13 +433,18 @@ def get_trending_cities():
         print("Error scraping trending cities from Wikipedia:", e)
         return []
 
+def prefetch_current_weather(location):
+    return _pool.submit(get_current_weather, location)
+
+def _trending_city_list():
+    return get_trending_cities() or list(TRENDING_FALLBACK_CITIES)
+
+def warm_trending_cache():
+    return _pool.submit(lambda: geocode_locations_bulk(_trending_city_list()))
+
 def get_trending_weather():
-    trending_cities = get_trending_cities()
-    if not trending_cities:
-        trending_cities = ["Chicago", "London", "Tokyo", "Sydney", "Paris"]
-    results = {}
-    for city in trending_cities:
-        results[city] = get_current_weather(city)
+    trending_cities = _trending_city_list()
+    results = dict(zip(trending_cities, _current_weather_many(trending_cities)))
     return {"trending_weather": results}
 
 def get_seasonal_changes(region):
@@ -329,19 +452,7 @@ def get_seasonal_changes(region):
     if geocode_result is None:
         return {"error": f"Could not geocode region '{region}'."}
     lat, lon = geocode_result["lat"], geocode_result["lon"]
-    geocode_details = {
-        "name": geocode_result.get("name", "Unknown"),
-        "region": geocode_result.get("region", "Unknown"),
-        "country": geocode_result.get("country", "Unknown")
-    }
-
-    current = get_current_weather(region)
-    if not current or "error" in current:
-        return {"error": "No current weather data available."}
-
-    current_temp = current.get("current_weather", {}).get("temperature_celsius")
-    if current_temp is None:
-        return {"error": "No current temperature available."}
+    geocode_details = _geocode_details(geocode_result)
 
     last_year_date = (date.today() - timedelta(days=365)).isoformat()
     url = "https://archive-api.open-meteo.com/v1/archive"
@@ -353,11 +464,20 @@ def get_seasonal_changes(region):
         "daily": "temperature_2m_max,temperature_2m_min",
         "timezone": "auto"
     }
+    current_future = _pool.submit(_current_weather_at, lat, lon)
+    historical_future = _pool.submit(_cached_get, url, params, _archive_ttl(last_year_date))
 
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        historical = response.json()
+        current = current_future.result()
+    except Exception:
+        return {"error": "No current weather data available."}
+
+    current_temp = current.get("temperature_celsius")
+    if current_temp is None:
+        return {"error": "No current temperature available."}
+
+    try:
+        historical = historical_future.result()
         historical_daily = historical.get("daily", {})
         if not historical_daily.get("temperature_2m_max") or not historical_daily.get("temperature_2m_min"):
             return {"error": "No historical data available."}
@@ -480,15 +600,22 @@ def get_weather_recommendation(user_id):
 
 
 def get_prediction_confidence(location):
-    current = get_current_weather(location)
-    forecast = get_forecast(location)
+    geocode_result = geocode_location(location)
+    if geocode_result is None:
+        return {"error": "Current weather data not available."}
+    lat, lon = geocode_result["lat"], geocode_result["lon"]
 
-    if not current or "error" in current:
+    current_future = _pool.submit(_current_weather_at, lat, lon)
+    forecast_future = _pool.submit(_forecast_at, lat, lon)
+    try:
+        current_weather = current_future.result()
+    except Exception:
         return {"error": "Current weather data not available."}
-    if not forecast or "error" in forecast:
+    try:
+        forecast_list = forecast_future.result()
+    except Exception:
         return {"error": "Forecast data not available for prediction confidence."}
 
-    current_weather = current.get("current_weather", {})
     current_temp = current_weather.get("temperature_celsius") or current_weather.get("temperature")
     if current_temp is None:
         return {"error": "No current temperature available."}
@@ -497,27 +624,18 @@ def get_prediction_confidence(location):
     except Exception:
         return {"error": "Current temperature is not a valid number."}
 
-    forecast_list = forecast.get("forecast", [])
     if not forecast_list:
         return {"error": "No forecast data available for prediction confidence."}
 
-    forecast_temps = []
-    for day in forecast_list:
-        max_temp_str = day.get("max_temp", "")
-        if max_temp_str:
-            try:
-                temp_val = float(max_temp_str.split("°")[0])
-                forecast_temps.append(temp_val)
-            except Exception:
-                continue
+    forecast_temps = [day["max_temp_c"] for day in forecast_list if day.get("max_temp_c") is not None]
     if not forecast_temps:
         return {"error": "Forecast temperature data unavailable for prediction confidence."}
 
-    forecast_avg = sum(forecast_temps) / len(forecast_temps)
+    forecast_avg = fmean(forecast_temps)
     diff = abs(current_temp - forecast_avg)
     confidence = max(0, 100 - diff * 5)
 
-    geocode_details = current.get("geocode", {"name": location})
+    geocode_details = _geocode_details(geocode_result)
 
     return {
         "geocode": geocode_details,
@@ -526,15 +644,13 @@ def get_prediction_confidence(location):
     }
 
 def get_historical_weather(location, date_str):
-    geocode_result = geocode_location(location)
+    return _historical_weather_result(location, geocode_location(location), date_str)
+
+def _historical_weather_result(location, geocode_result, date_str):
     if geocode_result is None:
         return {"error": f"Could not geocode location '{location}'."}
     lat, lon = geocode_result["lat"], geocode_result["lon"]
-    geocode_details = {
-        "name": geocode_result.get("name", "Unknown"),
-        "region": geocode_result.get("region", "Unknown"),
-        "country": geocode_result.get("country", "Unknown")
-    }
+    geocode_details = _geocode_details(geocode_result)
 
     url = "https://archive-api.open-meteo.com/v1/archive"
     params = {
@@ -547,9 +663,7 @@ def get_historical_weather(location, date_str):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = _cached_get(url, params, _archive_ttl(date_str))
         daily = data.get("daily", {})
         units = data.get("daily_units", {})
 
@@ -557,15 +671,19 @@ def get_historical_weather(location, date_str):
                 "precipitation_sum")):
             return {"error": "No historical data available."}
 
-        daily_summary = []
-        for i in range(len(daily["time"])):
-            day_summary = {
-                "date": daily["time"][i],
-                "max_temp": f"{daily['temperature_2m_max'][i]} {units.get('temperature_2m_max', '').strip()}",
-                "min_temp": f"{daily['temperature_2m_min'][i]} {units.get('temperature_2m_min', '').strip()}",
-                "precipitation": f"{daily['precipitation_sum'][i]} {units.get('precipitation_sum', '').strip()}"
+        max_unit = units.get("temperature_2m_max", "").strip()
+        min_unit = units.get("temperature_2m_min", "").strip()
+        precip_unit = units.get("precipitation_sum", "").strip()
+        daily_summary = [
+            {
+                "date": day,
+                "max_temp": f"{max_temp} {max_unit}",
+                "min_temp": f"{min_temp} {min_unit}",
+                "precipitation": f"{precip} {precip_unit}"
             }
-            daily_summary.append(day_summary)
+            for day, max_temp, min_temp, precip in zip(
+                daily["time"], daily["temperature_2m_max"], daily["temperature_2m_min"], daily["precipitation_sum"])
+        ]
 
         result = {
             "geocode": geocode_details,
@@ -575,6 +693,15 @@ def get_historical_weather(location, date_str):
     except Exception as e:
         return {"error": str(e)}
 
+def get_historical_weather_many(locations, date_str):
+    unique = {}
+    for loc in locations:
+        unique.setdefault(normalize(loc), loc)
+    geocoded = geocode_locations_bulk(unique.values())
+    results = _pool.map(lambda loc: _historical_weather_result(loc, geocoded[loc], date_str), unique.values())
+    by_key = dict(zip(unique, results))
+    return {loc: by_key[normalize(loc)] for loc in locations}
+
 def get_realtime_weather(location):
     data = get_current_weather(location)
     if "error" in data:
@@ -599,40 +726,32 @@ def get_detailed_forecast(location):
         "alerts": "no"
     }
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = _cached_get(url, params, DETAILED_FORECAST_TTL)
 
-        location_data = data.get("location", {})
-        if "localtime_epoch" in location_data:
-            location_data.pop("localtime_epoch")
+        location_data = {key: value for key, value in data.get("location", {}).items() if key != "localtime_epoch"}
 
         forecast_days = data.get("forecast", {}).get("forecastday", [])
-        hourly_data = []
-        for day in forecast_days:
-            hourly = day.get("hour", [])
-            hourly_data.extend(hourly)
-        hourly_data = hourly_data[:24]
-
-        filtered_hourly = []
-        for entry in hourly_data:
-            filtered_entry = {
+        hourly_data = islice(chain.from_iterable(day.get("hour", []) for day in forecast_days), 24)
+
+        filtered_hourly = [
+            {
                 "time": entry.get("time"),
                 "temp_c": entry.get("temp_c"),
-                "condition": entry.get("condition", {}).get("text"),
+                "condition": (entry.get("condition") or {}).get("text"),
                 "wind_kph": entry.get("wind_kph"),
                 "wind_dir": entry.get("wind_dir"),
                 "humidity": entry.get("humidity"),
                 "chance_of_rain": entry.get("chance_of_rain"),
             }
-            filtered_hourly.append(filtered_entry)
+            for entry in hourly_data
+        ]
 
         return {
             "location": location_data,
             "hourly": filtered_hourly
         }
     except requests.exceptions.HTTPError as http_err:
-        if response.status_code == 400:
+        if http_err.response is not None and http_err.response.status_code == 400:
             return {"error": "Location could not be geocoded. Please check your input."}
         else:
             return {"error": str(http_err)}
@@ -0,0 +1,142 @@
+import threading
+
+import pytest
+
+from services import cache_functions
+from services.cache_functions import TTLCache, SingleFlight, RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_functions.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(cache_functions.time, "sleep", fake.sleep)
+    return fake
+
+
+def test_ttl_cache_returns_value_until_expiry(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    clock.now += 10.5
+    assert cache.get("a") is None
+    assert cache.get("a", "missing") == "missing"
+
+
+def test_ttl_cache_per_entry_ttl_overrides_default(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("short", 1, ttl=1)
+    cache.set("long", 2)
+    clock.now += 2
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+
+
+def test_ttl_cache_caches_falsy_values(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("miss", False)
+    assert cache.get("miss") is False
+
+
+def test_ttl_cache_evicts_expired_entries_before_live_ones(clock):
+    cache = TTLCache(ttl=10, maxsize=2)
+    cache.set("old", 1, ttl=1)
+    cache.set("live", 2)
+    clock.now += 5
+    cache.set("new", 3)
+    assert cache.get("live") == 2
+    assert cache.get("new") == 3
+    assert cache.get("old") is None
+
+
+def test_ttl_cache_evicts_oldest_insert_when_full(clock):
+    cache = TTLCache(ttl=10, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_overwrite_does_not_evict(clock):
+    cache = TTLCache(ttl=10, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+    assert cache.get("a") == 10
+    assert cache.get("b") == 2
+
+
+def test_ttl_cache_clear(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    cache.clear()
+    assert cache.get("a") is None
+
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow(value):
+        calls.append(value)
+        started.set()
+        release.wait(5)
+        return value * 2
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", slow, 21)))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", slow, 21))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert calls == [21]
+    assert results == [42, 42, 42, 42]
+
+
+def test_single_flight_propagates_exceptions_and_releases_key():
+    flight = SingleFlight()
+
+    def boom():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("k", boom)
+    assert flight.do("k", lambda: "ok") == "ok"
+
+
+def test_rate_limiter_spaces_calls_by_min_interval(clock):
+    limiter = RateLimiter(min_interval=1.5)
+    limiter.wait()
+    limiter.wait()
+    limiter.wait()
+    assert clock.sleeps == [1.5, 1.5]
+
+
+def test_rate_limiter_does_not_sleep_after_idle_gap(clock):
+    limiter = RateLimiter(min_interval=1.5)
+    limiter.wait()
+    clock.now += 10
+    limiter.wait()
+    assert clock.sleeps == []
@@ -0,0 +1,135 @@
+from types import SimpleNamespace
+
+import pytest
+
+from services.alert_functions import (
+    ALERT_TYPE_PRECIP, ALERT_TYPE_TEMP, ALERT_TYPE_WIND, NUMBER_RE, PRECIP_CODES, _validate_custom_params,
+    evaluate_custom_alert, evaluate_custom_alerts, map_precipitation_category
+)
+
+
+def weather(temp=20.0, wind=10.0, description="Clear sky"):
+    return {"current_weather": {
+        "temperature_celsius": temp,
+        "wind_speed_kph": wind,
+        "weather_description": description
+    }}
+
+
+def custom_sub(alert_type, operator=None, threshold=None):
+    if alert_type == ALERT_TYPE_PRECIP:
+        threshold_num, threshold_code = None, PRECIP_CODES[threshold]
+    else:
+        threshold_num, threshold_code = float(threshold), None
+    return SimpleNamespace(location="Paris", alert_type=alert_type, operator=operator, threshold=threshold,
+                           threshold_num=threshold_num, threshold_code=threshold_code)
+
+
+@pytest.mark.parametrize("threshold, valid", [
+    ("30", True),
+    ("-3", True),
+    ("+12.5", True),
+    (".5", True),
+    ("1e3", True),
+    ("", False),
+    ("hot", False),
+    ("nan", False),
+    ("inf", False),
+    ("1_000", False),
+])
+def test_number_re_accepts_plain_numbers_only(threshold, valid):
+    assert bool(NUMBER_RE.fullmatch(threshold)) == valid
+
+
+@pytest.mark.parametrize("condition, operator, threshold, expected", [
+    ("temperature", ">", "30", (ALERT_TYPE_TEMP, ">", "30", 30.0, None, None)),
+    (" Wind_Speed ", " < ", " 12.5 ", (ALERT_TYPE_WIND, "<", "12.5", 12.5, None, None)),
+    ("precipitation", None, "Cloudy", (ALERT_TYPE_PRECIP, None, "no rain", None, 0, None)),
+    ("precipitation", ">", "heavy", (ALERT_TYPE_PRECIP, None, "heavy", None, 3, None)),
+])
+def test_validate_custom_params_normalises_input(condition, operator, threshold, expected):
+    assert _validate_custom_params(condition, operator, threshold) == expected
+
+
+@pytest.mark.parametrize("condition, operator, threshold, error", [
+    (None, ">", "30", "missing_condition"),
+    ("humidity", ">", "30", "bad_condition"),
+    ("temperature", "=", "30", "bad_operator"),
+    ("temperature", ">", "", "missing_threshold"),
+    ("temperature", ">", "hot", "threshold_not_numeric"),
+    ("precipitation", None, "drizzle", "bad_precip_threshold"),
+])
+def test_validate_custom_params_reports_errors(condition, operator, threshold, error):
+    assert _validate_custom_params(condition, operator, threshold)[-1] == error
+
+
+@pytest.mark.parametrize("operator, threshold, temp, fires", [
+    (">", "30", 30.5, True),
+    (">", "30", 30.0, False),
+    (">", "30", 29.0, False),
+    ("<", "5", 4.9, True),
+    ("<", "5", 5.0, False),
+    (">", "-3", -2.0, True),
+])
+def test_temperature_thresholds_are_strict(operator, threshold, temp, fires):
+    alert = evaluate_custom_alert(custom_sub(ALERT_TYPE_TEMP, operator, threshold), weather(temp=temp))
+    assert (alert is not None) == fires
+
+
+def test_wind_alert_message_uses_stored_threshold_text():
+    alert = evaluate_custom_alert(custom_sub(ALERT_TYPE_WIND, ">", "40"), weather(wind=45))
+    assert alert == "Wind speed at Paris is 45 km/h, exceeding 40 km/h."
+
+
+@pytest.mark.parametrize("description, threshold, fires", [
+    ("Heavy rain", "heavy", True),
+    ("Moderate rain", "heavy", False),
+    ("Light freezing rain", "light", True),
+    ("Overcast", "no rain", True),
+    ("Unknown", "no rain", False),
+])
+def test_precipitation_alerts_match_category(description, threshold, fires):
+    alert = evaluate_custom_alert(custom_sub(ALERT_TYPE_PRECIP, threshold=threshold), weather(description=description))
+    assert (alert is not None) == fires
+
+
+def test_missing_reading_values_never_fire():
+    subs = [custom_sub(ALERT_TYPE_TEMP, ">", "-100"), custom_sub(ALERT_TYPE_WIND, "<", "1000")]
+    assert evaluate_custom_alerts(subs, weather(temp=None, wind=None)) == []
+
+
+def test_subscriptions_without_typed_thresholds_never_fire():
+    legacy = custom_sub(ALERT_TYPE_TEMP, ">", "30")
+    legacy.threshold_num = None
+    assert evaluate_custom_alert(legacy, weather(temp=40)) is None
+
+
+def test_batch_matches_individual_evaluation():
+    subs = [
+        custom_sub(ALERT_TYPE_TEMP, ">", "30"),
+        custom_sub(ALERT_TYPE_TEMP, ">", "36"),
+        custom_sub(ALERT_TYPE_TEMP, "<", "40"),
+        custom_sub(ALERT_TYPE_WIND, ">", "44"),
+        custom_sub(ALERT_TYPE_PRECIP, threshold="heavy"),
+        custom_sub(ALERT_TYPE_PRECIP, threshold="light"),
+    ]
+    current = weather(temp=36, wind=45, description="Heavy rain")
+    individual = [alert for alert in (evaluate_custom_alert(sub, current) for sub in subs) if alert]
+    assert evaluate_custom_alerts(subs, current) == individual
+    assert len(individual) == 4
+
+
+def test_no_current_weather_returns_no_alerts():
+    assert evaluate_custom_alerts([custom_sub(ALERT_TYPE_TEMP, ">", "0")], {}) == []
+
+
+@pytest.mark.parametrize("description, category", [
+    ("Slight rain showers", "light"),
+    ("Light freezing rain", "light"),
+    ("Thunderstorm with heavy hail", "heavy"),
+    ("Slight or moderate thunderstorm", "moderate"),
+    ("Fog", "no rain"),
+    (None, "unknown"),
+])
+def test_map_precipitation_category(description, category):
+    assert map_precipitation_category(description) == category
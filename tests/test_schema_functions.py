@@ -0,0 +1,67 @@
+import pytest
+from flask import Flask
+from sqlalchemy import text
+
+from models import db
+from services.schema_functions import upgrade_schema
+
+LEGACY_SCHEMA = (
+    """CREATE TABLE subscriptions (
+        id INTEGER NOT NULL PRIMARY KEY,
+        user_id VARCHAR(100) NOT NULL,
+        location VARCHAR(255) NOT NULL,
+        alert_type VARCHAR(50) NOT NULL,
+        created_at DATETIME,
+        CONSTRAINT unique_subscription UNIQUE (user_id, location, alert_type)
+    )""",
+    """CREATE TABLE custom_subscription (
+        id INTEGER NOT NULL PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        location VARCHAR(100) NOT NULL,
+        alert_type INTEGER NOT NULL,
+        operator VARCHAR(2),
+        threshold VARCHAR(20),
+        created_at DATETIME
+    )""",
+    "INSERT INTO subscriptions (user_id, location, alert_type) VALUES ('alice', 'Paris', '1'), ('alice', 'Paris', '8')",
+    """INSERT INTO custom_subscription (user_id, location, alert_type, operator, threshold) VALUES
+        (1, 'Paris', 1, '>', '30'),
+        (1, 'Paris', 2, '<', ' 12.5'),
+        (1, 'Paris', 3, NULL, 'heavy'),
+        (1, 'Paris', 3, NULL, 'no rain')""",
+)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'legacy.db'}"
+    db.init_app(app)
+    with app.app_context():
+        with db.engine.begin() as conn:
+            for statement in LEGACY_SCHEMA:
+                conn.execute(text(statement))
+        db.create_all()
+        yield app
+
+
+def test_upgrade_casts_alert_type_to_integer(app):
+    upgrade_schema()
+    rows = db.session.execute(text("SELECT alert_type, typeof(alert_type) FROM subscriptions ORDER BY id")).all()
+    assert rows == [(1, "integer"), (8, "integer")]
+
+
+def test_upgrade_backfills_custom_thresholds(app):
+    upgrade_schema()
+    rows = db.session.execute(text(
+        "SELECT alert_type, threshold_num, threshold_code FROM custom_subscription ORDER BY id")).all()
+    assert rows == [(1, 30.0, None), (2, 12.5, None), (3, None, 3), (3, None, 0)]
+
+
+def test_upgrade_is_idempotent(app):
+    upgrade_schema()
+    upgrade_schema()
+    assert db.session.execute(text("SELECT COUNT(*) FROM subscriptions")).scalar() == 2
+    assert db.session.execute(text("SELECT COUNT(*) FROM custom_subscription")).scalar() == 4
+    indexes = {row[0] for row in db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+    assert "ix_custom_sub_lookup" in indexes